@@ -0,0 +1,43 @@
+"""Indicator kernels, optionally compiled ahead of time with numba.pycc
+
+Run ``python indicators_aot.py`` once to build the ``_indicators`` extension
+module next to this file. main.py imports the compiled kernels from there and
+falls back to JIT-compiling the plain functions below when the extension is
+missing or out of date.
+
+After changing a kernel or its signature, bump KERNEL_VERSION and rebuild;
+main.py ignores an extension built for a different version.
+"""
+import numpy as np
+
+# Bumped whenever a kernel body or signature changes
+KERNEL_VERSION = 3
+
+ADVANCE_INDICATORS_SIGNATURE = 'void(f8[:], f8[:], f8[:], f8[:], f8[:], i8, i8)'
+
+def advance_indicators(ema, ema_prev, alpha, one_minus_alpha, close, start, stop):
+    """Fold the newly closed candles close[start:stop] into the online EMA state.
+
+    ema holds one adjust=False EMA per span and ema_prev its value one candle
+    earlier, with the smoothing factors precomputed in alpha and one_minus_alpha."""
+    for i in range(start, stop):
+        x = close[i]
+        for k in range(len(ema)):
+            ema_prev[k] = ema[k]
+            if np.isnan(ema[k]):
+                ema[k] = x
+            else:
+                ema[k] = alpha[k] * x + one_minus_alpha[k] * ema[k]
+
+def kernel_version():
+    """Return the KERNEL_VERSION the kernels were built from"""
+    return KERNEL_VERSION
+
+if __name__ == "__main__":
+    # pycc is only needed for the build, never at runtime
+    from numba.pycc import CC
+
+    cc = CC('_indicators')
+    cc.export('advance_indicators', ADVANCE_INDICATORS_SIGNATURE)(advance_indicators)
+    cc.export('kernel_version', 'i8()')(kernel_version)
+    cc.compile()
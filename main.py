@@ -1,83 +1,169 @@
 import os
 import sys
+import atexit
 import logging
+import logging.handlers
+import queue
 import time
-import pandas as pd
+import warnings
+import numpy as np
 from typing import Optional
+from urllib.parse import urlsplit
 from iqoptionapi.stable_api import IQ_Option
-from flask import Flask
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Process
 from threading import Thread
 
-app = Flask('')
-
-@app.route('/')
-def home():
-    return "Server is running!"
+import indicators_aot
+
+try:
+    # Ahead-of-time build from indicators_aot.py (python indicators_aot.py)
+    import _indicators
+except ImportError:
+    _indicators = None
+
+if _indicators is not None and getattr(_indicators, 'kernel_version', lambda: None)() != indicators_aot.KERNEL_VERSION:
+    # Built from older kernel code; its signatures may no longer match the callers
+    warnings.warn(
+        "_indicators extension is out of date; rebuild it with 'python indicators_aot.py'. "
+        "Falling back to the JIT-compiled kernels."
+    )
+    _indicators = None
+
+if _indicators is not None:
+    advance_indicators = _indicators.advance_indicators
+else:
+    from numba import njit
+    advance_indicators = njit(cache=True)(indicators_aot.advance_indicators)
+
+LOG_FORMATTER = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+# Background listeners that write queued log records; stopped (and flushed) on exit
+_log_listeners = []
+
+# EMA spans (cross, trend, base) and Bollinger window used by the signal
+EMA_SPANS = np.array([12, 50, 200], dtype=np.float64)
+BB_WINDOW = 20
+
+# Longest time the cached account balance is reused before re-reading it (seconds)
+BALANCE_TTL = 60
+
+# OHLC is kept in float64: assets are free-form (FX, crypto, stocks, indices) and float32
+# cannot tell apart quotes such as 60000.01 and 60000.012
+PRICE_DTYPE = np.float64
+
+# Layout of a candle as returned by IQ_Option.get_candles
+CANDLE_DTYPE = np.dtype([
+    ('id', np.int64),
+    ('open', PRICE_DTYPE),
+    ('close', PRICE_DTYPE),
+    ('min', PRICE_DTYPE),
+    ('max', PRICE_DTYPE)
+])
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answer keep-alive pings on / with a static status line"""
+
+    def do_GET(self):
+        self._respond(include_body=True)
+
+    def do_HEAD(self):
+        self._respond(include_body=False)
+
+    def _respond(self, include_body: bool) -> None:
+        # Ignore the query string so cache-busting pings like /?ping=1 still match
+        if urlsplit(self.path).path != '/':
+            self.send_error(404)
+            return
+        body = b"Server is running!"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Pings are frequent and uninteresting; keep them out of the trading logs
+        pass
 
 def run():
-    app.run(host='0.0.0.0',port=8080)
+    ThreadingHTTPServer(('0.0.0.0', 8080), KeepAliveHandler).serve_forever()
 
 def server_on():
     t = Thread(target=run)
     t.start()
 
-def get_env_data():
-
-    # ดึงทุก environment variables ที่มีอยู่ในระบบ
-    env_data = dict(os.environ)
-    
-    # แปลงค่า LOG_ เป็น boolean ถ้ามี
-    if 'LOG_' in env_data:
-        env_data['LOG_'] = True if env_data['LOG_'].lower() == 'true' else False
-
-    return env_data
+def _make_logger(asset_name: str) -> logging.Logger:
+    """Return the logger for an asset, creating its console and file output on first use"""
+    asset_logger = logging.getLogger(f"trader.{asset_name}")
+    if asset_logger.handlers:
+        return asset_logger
+    asset_logger.setLevel(logging.INFO)
+
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(LOG_FORMATTER)
+
+    # File handler
+    log_file_name = f"{asset_name}.log".replace("/", "_").replace(":", "_")
+    file_handler = logging.FileHandler(f"log/{log_file_name}")
+    file_handler.setFormatter(LOG_FORMATTER)
+
+    # The trading loop only enqueues records; a listener thread does the actual I/O
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler)
+    listener.start()
+    _log_listeners.append(listener)
+    asset_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    return asset_logger
+
+def _stop_log_listeners() -> None:
+    """Flush pending log records and stop the listener threads"""
+    while _log_listeners:
+        _log_listeners.pop().stop()
+
+atexit.register(_stop_log_listeners)
 
 class IQOptionTrader:
     """A class to manage trading operations with IQ Option"""
     
     def __init__(self, SELECT_ASSET="EURUSD"):
-        self._setup_logging(SELECT_ASSET)
+        self.logger = _make_logger(SELECT_ASSET)
         self.config = self._load_config()
         self.config.select_asset = SELECT_ASSET
         self.amount: int = self.config.start_bet
         self.mm: int = 0
         self.direction: str = "call"
         self.account: Optional[IQ_Option] = None
+        self._balance: Optional[float] = None
+        self._balance_ts: float = float('-inf')
         self._initialize_connection()
 
         # Candle size (1 minute)
         self.candle_size: int = 60
 
+        # Rolling candle history, refreshed incrementally by _get_price_data
+        self.history_size: int = 200
+        self._open = np.empty(self.history_size, dtype=PRICE_DTYPE)
+        self._close = np.empty(self.history_size, dtype=PRICE_DTYPE)
+        self._low = np.empty(self.history_size, dtype=PRICE_DTYPE)
+        self._high = np.empty(self.history_size, dtype=PRICE_DTYPE)
+        self._id = np.zeros(self.history_size, dtype=np.int64)
+        self._reset_history()
+
+        # EMA smoothing factors for EMA_SPANS, computed once
+        self._alpha = 2.0 / (EMA_SPANS + 1.0)
+        self._one_minus_alpha = 1.0 - self._alpha
+
         self.TempLose = 0
         self.MaxLose = 0
         self.gameWin = 0
         self.gameLose = 0
 
-    def _setup_logging(self, asset_name: str) -> None:
-        """Configure logging settings with file output per asset"""
-        log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
-
-        # Clear previous handlers to prevent duplicate logs
-        if self.logger.hasHandlers():
-            self.logger.handlers.clear()
-
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(log_formatter)
-        self.logger.addHandler(console_handler)
-
-        # File handler
-        log_file_name = f"{asset_name}.log".replace("/", "_").replace(":", "_")
-        file_handler = logging.FileHandler(f"log/{log_file_name}")
-        file_handler.setFormatter(log_formatter)
-        self.logger.addHandler(file_handler)
-
     def _load_config(self) -> dict:
         """Load and validate configuration from environment"""
         try:
-            env_data = get_env_data()
             required_fields = {
                 'API_USERNAME': str,
                 'API_PASSWORD': str,
@@ -90,13 +176,17 @@ class IQOptionTrader:
             
             config = {}
             for field, field_type in required_fields.items():
-                if field not in env_data:
+                value = os.environ.get(field)
+                if value is None:
                     raise ValueError(f"Missing required config field: {field}")
-                config[field.lower()] = field_type(env_data[field])
+                config[field.lower()] = field_type(value)
+
+            # Optional: trade on the Bollinger/EMA cross signal instead of the latest candle's color
+            config['use_full_signal'] = os.environ.get('USE_FULL_SIGNAL', 'false').lower() == 'true'
                 
             return type('Config', (), config)()
         except (ValueError, TypeError) as e:
-            self.logger.error(f"Configuration error: {str(e)}")
+            self.logger.error("Configuration error: %s", e)
 
     def _initialize_connection(self) -> None:
         """Initialize and verify connection to IQ Option"""
@@ -104,114 +194,184 @@ class IQOptionTrader:
             self.account = IQ_Option(self.config.api_username, self.config.api_password)
             connected, reason = self.account.connect()
             if not connected:
-                self.logger.info(f"Connection failed: {reason}")
+                self.logger.info("Connection failed: %s", reason)
             
             self.logger.info("Successfully connected to IQ Option")
             self._switch_to_practice_account()
             
         except Exception as e:
-            self.logger.error(f"Connection initialization failed: {str(e)}")
+            self.logger.error("Connection initialization failed: %s", e)
 
     def _switch_to_practice_account(self) -> None:
         """Switch to practice account and log balance"""
         try:
             self.account.change_balance(self.config.api_balance)
-            balance = self.account.get_balance()
-            self.logger.info(f"Switched to practice account. Current balance: {balance} USD")
+            balance = self._get_balance(refresh=True)
+            self.logger.info("Switched to practice account. Current balance: %s USD", balance)
         except Exception as e:
-            self.logger.error(f"Failed to switch account: {str(e)}")
-
-    def _get_price_data(self) -> pd.DataFrame:
-        """Fetch historical price data for analysis and return it as a DataFrame"""
+            self.logger.error("Failed to switch account: %s", e)
+
+    def _get_balance(self, refresh: bool = False) -> float:
+        """Return the account balance, re-reading it from IQ Option at most every BALANCE_TTL seconds"""
+        now = time.monotonic()
+        if refresh or now - self._balance_ts >= BALANCE_TTL:
+            self._balance = self.account.get_balance()
+            self._balance_ts = now
+        return self._balance
+
+    def _get_price_data(self) -> dict:
+        """Refresh the cached candle history and return its OHLC columns as NumPy arrays"""
         try:
-            # Get enough candles for the slow MA (26) + signal (9)
+            # One clock reading for both the count and the request, so they agree on the newest candle
+            now = time.time()
+            if not self._last_id:
+                # Get enough candles for the slow MA (26) + signal (9)
+                count = self.history_size
+            else:
+                # Refetch the newest cached candle (it may still have been forming) plus any newer ones
+                elapsed = int(now) - self._last_id
+                count = min(elapsed // self.candle_size + 1, self.history_size)
+
             candles = self.account.get_candles(
                 self.config.select_asset,
                 self.candle_size,
-                200,
-                time.time()
+                count,
+                now
             )
-            
-            # Convert the candles into a DataFrame
-            price_data = pd.DataFrame([
-                {
-                    'open': candle['open'],
-                    'close': candle['close'],
-                    'low': candle['min'],
-                    'high': candle['max']
-                }
-                for candle in candles
-            ])
-            
-            # Ensure that the data is sorted by time in ascending order
-            price_data['id'] = pd.to_datetime([candle['id'] for candle in candles], unit='s')
-            price_data.set_index('id', inplace=True)
-
-            return price_data
+            if not self._store_candles(candles):
+                # The fetch no longer overlaps the cache, so rebuild the full history
+                candles = self.account.get_candles(
+                    self.config.select_asset,
+                    self.candle_size,
+                    self.history_size,
+                    now
+                )
+                self._store_candles(candles)
+
+            # Views onto the filled part of the history, oldest candle first
+            tail = slice(self.history_size - self._count, None)
+            return {
+                'open': self._open[tail],
+                'close': self._close[tail],
+                'low': self._low[tail],
+                'high': self._high[tail]
+            }
 
         except Exception as e:
-            self.logger.error(f"Failed to fetch price data: {str(e)}")
-            return pd.DataFrame()  # Return empty DataFrame if there's an error
-        
+            self.logger.error("Failed to fetch price data: %s", e)
+            return {}  # Return no data if there's an error
+
+    def _reset_history(self) -> None:
+        """Forget the cached candles and the online EMA state built from them"""
+        self._count: int = 0
+        self._last_id: int = 0
+        # EMA values as of the last closed candle, plus one candle earlier for cross detection
+        self._ema = np.full(len(EMA_SPANS), np.nan)
+        self._ema_prev = np.full(len(EMA_SPANS), np.nan)
+
+    def _store_candles(self, candles) -> bool:
+        """Merge freshly fetched candles into the tail of the history buffers.
+
+        Returns False, after resetting the history, if the candles do not overlap the cache."""
+        # Unpack the candle dicts into contiguous per-field arrays in one pass
+        fresh = np.fromiter(
+            ((c['id'], c['open'], c['close'], c['min'], c['max']) for c in candles),
+            dtype=CANDLE_DTYPE,
+            count=len(candles)
+        )
+        fresh = fresh[fresh['id'] >= self._last_id]
+        if not len(fresh):
+            return True
+
+        if self._last_id and fresh['id'][0] != self._last_id:
+            # Keeping only this partial batch would leave the history short for good
+            self._reset_history()
+            return False
+
+        # Shift out the oldest candles to make room for the new ones
+        n_new = len(fresh) - int(fresh['id'][0] == self._last_id)
+        if n_new:
+            for buf in (self._open, self._close, self._low, self._high, self._id):
+                buf[:-n_new] = buf[n_new:]
+
+        # Write the tail; a refetched candle overwrites its old slot
+        tail = slice(self.history_size - len(fresh), None)
+        self._open[tail] = fresh['open']
+        self._close[tail] = fresh['close']
+        self._low[tail] = fresh['min']
+        self._high[tail] = fresh['max']
+        self._id[tail] = fresh['id']
+
+        self._count = min(self._count + n_new, self.history_size)
+        self._last_id = int(fresh['id'][-1])
+
+        # Every candle before the tail is closed; fold the ones that just closed into the EMAs.
+        # Only the full signal reads them, so skip the work entirely otherwise.
+        if self.config.use_full_signal:
+            first = self.history_size - self._count
+            advance_indicators(
+                self._ema, self._ema_prev, self._alpha, self._one_minus_alpha, self._close,
+                max(first, self.history_size - 1 - n_new), self.history_size - 1
+            )
+        return True
+
+    def _bollinger_bands(self, close) -> tuple:
+        """Return the lower and upper Bollinger Band of the second-last candle"""
+        # The window is only 20 closes, so it is recomputed on demand rather than kept as running sums
+        window = close[-BB_WINDOW - 1:-1]
+        sma = window.mean()
+        std = window.std(ddof=1)
+        return sma - 2 * std, sma + 2 * std
+
     def _analyze_market(self) -> Optional[str]:
         """Analyze market conditions using Stochastic RSI strategy"""
         try:
             price_data = self._get_price_data()
 
-            if price_data.empty or len(price_data) < 2:
-                self.logger.error(f"{self.config.select_asset} Price data is empty or too short.")
-                return None
-
-            if not all(col in price_data.columns for col in ['low', 'high']):
-                self.logger.error(f"{self.config.select_asset} Missing required columns: 'low', 'high'")
-                return None
-
-            # Calculate Bollinger Bands
-            price_data['SMA'] = price_data['close'].rolling(window=20).mean()
-            price_data['STD'] = price_data['close'].rolling(window=20).std()
-            price_data['Upper_BB'] = price_data['SMA'] + 2 * price_data['STD']
-            price_data['Lower_BB'] = price_data['SMA'] - 2 * price_data['STD']
-
-            # Calculate EMA
-            price_data['ema_cross'] = price_data['close'].ewm(span=12, adjust=False).mean()
-            price_data['ema_trend'] = price_data['close'].ewm(span=50, adjust=False).mean()
-            price_data['ema_base'] = price_data['close'].ewm(span=200, adjust=False).mean()
-
-            price_data = price_data.dropna()
-            if price_data.empty or len(price_data) < 2:
-                self.logger.error(f"{self.config.select_asset} Not enough valid data after indicators.")
+            if not price_data or len(price_data['close']) < 2:
+                self.logger.error("%s Price data is empty or too short.", self.config.select_asset)
                 return None
 
-            latest_row = price_data.iloc[-1]
-            second_last_row = price_data.iloc[-2]
-            third_last_row = price_data.iloc[-2]
-
-            trendUp = second_last_row['ema_base'] < second_last_row['ema_trend'] < second_last_row['ema_cross']
-            trendDn = second_last_row['ema_base'] > second_last_row['ema_trend'] > second_last_row['ema_cross']
-            priceIn = second_last_row['low'] > second_last_row['Lower_BB'] and second_last_row['high'] < second_last_row['Upper_BB']
-
-            crossOver = third_last_row['ema_cross'] < third_last_row['ema_trend'] and second_last_row['ema_cross'] > second_last_row['ema_trend']
-            crossUnder = third_last_row['ema_cross'] > third_last_row['ema_trend'] and second_last_row['ema_cross'] < second_last_row['ema_trend']
-
-            Signal_buy = trendUp and priceIn and crossOver
-            Signal_sell = trendDn and priceIn and crossUnder
-
-            # print(f"{self.config.select_asset} Signal: Buy={Signal_buy}, Sell={Signal_sell}")
-            # self.logger.info(f"{self.config.select_asset} Signal: Buy={Signal_buy}, Sell={Signal_sell}")
-
-            if latest_row['close'] > latest_row['open']:
+            open_ = price_data['open']
+            close = price_data['close']
+            low = price_data['low']
+            high = price_data['high']
+
+            if self.config.use_full_signal:
+                if len(close) < BB_WINDOW + 1:
+                    self.logger.error("%s Not enough valid data after indicators.", self.config.select_asset)
+                    return None
+
+                # EMA values for the second-last and third-last candles are kept up to date as candles close
+                cross_prev, trend_prev, base_prev = self._ema
+                cross_third, trend_third, _ = self._ema_prev
+
+                # Check the cheap trend/cross conditions first and bail out as soon as one fails
+                if base_prev < trend_prev < cross_prev:
+                    direction = 'call'
+                    crossed = cross_third < trend_third and cross_prev > trend_prev
+                elif base_prev > trend_prev > cross_prev:
+                    direction = 'put'
+                    crossed = cross_third > trend_third and cross_prev < trend_prev
+                else:
+                    return None
+                if not crossed:
+                    return None
+
+                lower_bb, upper_bb = self._bollinger_bands(close)
+                priceIn = low[-2] > lower_bb and high[-2] < upper_bb
+
+                return direction if priceIn else None
+
+            if close[-1] > open_[-1]:
                 return 'call'
-            elif latest_row['close'] < latest_row['open']:
+            elif close[-1] < open_[-1]:
                 return 'put'
-            # if Signal_buy:
-            #     return 'call'
-            # elif Signal_sell:
-            #     return 'put'
             else:
                 return None
 
         except Exception as e:
-            self.logger.error(f"{self.config.select_asset} Market analysis failed: {str(e)}")
+            self.logger.error("%s Market analysis failed: %s", self.config.select_asset, e)
             return None
 
     def create_order(self) -> None:
@@ -224,8 +384,9 @@ class IQOptionTrader:
                 return
             
             self.logger.info(
-                f"Account: {self.config.api_balance} {self.account.get_balance()}$ {self.config.select_asset} "
-                f"Win:{self.gameWin}, Lose:{self.gameLose}, MaxLose:{self.MaxLose}"
+                "Account: %s %s$ %s Win:%s, Lose:%s, MaxLose:%s",
+                self.config.api_balance, self._get_balance(), self.config.select_asset,
+                self.gameWin, self.gameLose, self.MaxLose
             )
 
             self.direction = direction
@@ -237,24 +398,25 @@ class IQOptionTrader:
             )
 
             if not status:
-                self.logger.error(f"Order creation failed. Status: {status}")
+                self.logger.error("Order creation failed. Status: %s", status)
                 return
 
             self.logger.info(
-                f"Order opened: {self.direction} {self.config.select_asset} "
-                f"ID: {position_id}, TF: {self.config.expiration}, Volume: {self.amount}"
+                "Order opened: %s %s ID: %s, TF: %s, Volume: %s",
+                self.direction, self.config.select_asset,
+                position_id, self.config.expiration, self.amount
             )
 
             self._handle_order_result(self.account.check_win_v3(position_id))
 
         except Exception as e:
-            self.logger.error(f"Order processing error: {str(e)}")
+            self.logger.error("Order processing error: %s", e)
 
     def _handle_order_result(self, win) -> None:
         """Process the result of a trade"""
         
         if win < 0:
-            self.logger.info(f"Loss: {win}$")
+            self.logger.info("Loss: %s$", win)
             self.amount += round((abs(win) + (abs(win) * .15)))
             self.mm += 1
             self.gameLose += 1
@@ -269,29 +431,56 @@ class IQOptionTrader:
 
             # self.create_order2(self.mm)
         else:
-            self.logger.info(f"Win: {win}$")
+            self.logger.info("Win: %s$", win)
             self.amount = self.config.start_bet
             self.mm = 0
             self.gameWin += 1
             self.TempLose = 0
 
+        # The balance only changes when a trade settles, so refresh the cached value now.
+        # A failed refresh keeps the previous value rather than losing the result above.
+        try:
+            self._get_balance(refresh=True)
+        except Exception as e:
+            self.logger.error("Failed to refresh balance: %s", e)
+
     def run(self) -> None:
         """Main trading loop with error handling"""
         try:
             while True:
                 self.create_order()
-                time.sleep(1)
+                if self.config.use_full_signal:
+                    # The full signal only reads closed candles, so wake just after the next one opens
+                    next_open = (int(time.time()) // self.candle_size + 1) * self.candle_size + 1
+                    time.sleep(max(0.1, next_open - time.time()))
+                else:
+                    # The default signal reads the forming candle, so keep polling it
+                    time.sleep(1)
         except KeyboardInterrupt:
             self.logger.info("Trading stopped by user")
         except Exception as e:
-            self.logger.error(f"Trading loop error: {str(e)}")
+            self.logger.error("Trading loop error: %s", e)
             raise
 
+def run_trader(asset: str) -> None:
+    """Process entry point: trade a single asset with its own IQ Option session"""
+    try:
+        IQOptionTrader(asset).run()
+    finally:
+        # Worker processes skip atexit handlers, so flush the queued records here
+        _stop_log_listeners()
+
 if __name__ == "__main__":
+    # Comma-separated assets, each traded in its own process
+    assets = [asset.strip() for asset in os.environ.get('SELECT_ASSETS', 'GBPUSD-OTC').split(',') if asset.strip()]
+    print("Trade:", ", ".join(assets))
+    processes = [Process(target=run_trader, args=(asset,), name=asset) for asset in assets]
+    for process in processes:
+        process.start()
+
+    # Start the keep-alive server only after forking so the children don't inherit its socket
     server_on()
-    defTrade = "GBPUSD-OTC"
-    print("Trade:",defTrade)
-    trader = IQOptionTrader(defTrade)
-    trader.run()
+    for process in processes:
+        process.join()
     input()
 
@@ -0,0 +1,81 @@
+import os
+import random
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def fake_candle(candle_id, now):
+    """Deterministic candle; only the one still forming at `now` changes over time"""
+    rng = random.Random(candle_id)
+    open_ = 1.3 + rng.random() * 1e-3
+    if candle_id + 60 > now:
+        close = open_ + (now - candle_id) * 1e-6
+    else:
+        close = open_ + (rng.random() - 0.5) * 1e-3
+    return {
+        'id': candle_id,
+        'open': open_,
+        'close': close,
+        'min': min(open_, close) - 1e-4,
+        'max': max(open_, close) + 1e-4
+    }
+
+
+class FakeIQOption:
+    """Stand-in for iqoptionapi's IQ_Option with no network access"""
+
+    def __init__(self, username, password):
+        self.balance = 1000.0
+        self.calls = []
+
+    def connect(self):
+        return True, None
+
+    def change_balance(self, balance_type):
+        pass
+
+    def get_balance(self):
+        self.calls.append('get_balance')
+        return self.balance
+
+    def get_candles(self, asset, size, count, end_time):
+        self.calls.append(('get_candles', count))
+        last_id = int(end_time) // size * size
+        return [fake_candle(last_id - (count - 1 - k) * size, end_time) for k in range(count)]
+
+
+stable_api = types.ModuleType('iqoptionapi.stable_api')
+stable_api.IQ_Option = FakeIQOption
+sys.modules.setdefault('iqoptionapi', types.ModuleType('iqoptionapi'))
+sys.modules.setdefault('iqoptionapi.stable_api', stable_api)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable wall clock, starting on a candle boundary"""
+    now = [1_700_000_040.0]
+    monkeypatch.setattr('time.time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def trader(monkeypatch, tmp_path, clock):
+    import main
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'log').mkdir()
+    for name, value in {
+        'API_USERNAME': 'user',
+        'API_PASSWORD': 'secret',
+        'START_BET': '1',
+        'MAX_MARTINGEL': '3',
+        'EXPIRATION': '1',
+        'API_BALANCE': 'PRACTICE',
+        'USE_FULL_SIGNAL': 'true',
+    }.items():
+        monkeypatch.setenv(name, value)
+    return main.IQOptionTrader('EURUSD-OTC')
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+import main
+from conftest import fake_candle
+
+
+def closed_closes(first_id, now):
+    """Final closes of every candle from first_id onwards that has closed by now"""
+    last_id = int(now) // 60 * 60
+    closes = [fake_candle(candle_id, now)['close'] for candle_id in range(first_id, last_id, 60)]
+    return np.array(closes, dtype=main.PRICE_DTYPE)
+
+
+def reference_ema(closes, span):
+    alpha = 2 / (span + 1)
+    ema = closes[0]
+    for x in closes[1:]:
+        ema = alpha * x + (1 - alpha) * ema
+    return ema
+
+
+def assert_matches_full_fetch(trader, now):
+    expected = trader.account.get_candles('', trader.candle_size, trader.history_size, now)
+    np.testing.assert_array_equal(trader._id, [c['id'] for c in expected])
+    for buf, field in ((trader._open, 'open'), (trader._close, 'close'),
+                       (trader._low, 'min'), (trader._high, 'max')):
+        np.testing.assert_array_equal(buf, np.array([c[field] for c in expected], dtype=main.PRICE_DTYPE))
+
+
+def assert_emas_match(trader, first_id, now):
+    closes = closed_closes(first_id, now)
+    expected = [reference_ema(closes, span) for span in main.EMA_SPANS]
+    expected_prev = [reference_ema(closes[:-1], span) for span in main.EMA_SPANS]
+    np.testing.assert_allclose(trader._ema, expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(trader._ema_prev, expected_prev, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('gap', [1, 2, 60, 185, 199])
+def test_incremental_fetch_matches_full_fetch(trader, clock, gap):
+    trader._get_price_data()
+    first_id = int(trader._id[0])
+
+    for step in (1, 30, gap * 60, 7, 60, 61):
+        clock[0] += step
+        price_data = trader._get_price_data()
+        assert_matches_full_fetch(trader, clock[0])
+
+    # The Bollinger Bands of the second-last candle cover the latest 20 closed candles
+    window = closed_closes(first_id, clock[0])[-main.BB_WINDOW:]
+    expected_std = window.std(ddof=1)
+    lower_bb, upper_bb = trader._bollinger_bands(price_data['close'])
+    assert expected_std > 0
+    assert lower_bb == pytest.approx(window.mean() - 2 * expected_std, abs=1e-12)
+    assert upper_bb == pytest.approx(window.mean() + 2 * expected_std, abs=1e-12)
+    assert_emas_match(trader, first_id, clock[0])
+
+
+def test_fetch_after_gap_beyond_history_restarts(trader, clock):
+    trader._get_price_data()
+    clock[0] += 60 * (trader.history_size + 50)
+    trader._get_price_data()
+
+    assert_matches_full_fetch(trader, clock[0])
+    assert trader._count == trader.history_size
+    assert_emas_match(trader, int(trader._id[0]), clock[0])
+
+
+def test_only_new_candles_are_requested(trader, clock):
+    trader._get_price_data()
+    clock[0] += 1
+    trader._get_price_data()
+    clock[0] += 125
+    trader._get_price_data()
+
+    fetched = [call[1] for call in trader.account.calls if call[0] == 'get_candles']
+    assert fetched == [trader.history_size, 1, 3]
+
+
+def test_high_priced_quotes_stay_distinct(trader):
+    trader._store_candles([
+        {'id': 1_700_000_040, 'open': 60000.01, 'close': 60000.012, 'min': 60000.0, 'max': 60000.02}
+    ])
+
+    assert trader._close[-1] > trader._open[-1]
+
+
+def test_fetch_across_candle_boundary_keeps_history(trader, clock, monkeypatch):
+    trader._get_price_data()
+
+    # The clock crosses a candle boundary between any two readings within the fetch
+    readings = iter([clock[0] + 59.9999, clock[0] + 60])
+    monkeypatch.setattr('time.time', lambda: next(readings, clock[0] + 60))
+    price_data = trader._get_price_data()
+
+    assert trader._count == trader.history_size
+    assert len(price_data['close']) == trader.history_size
+    assert_matches_full_fetch(trader, clock[0] + 59.9999)
+
+
+def test_fetch_without_overlap_refetches_full_history(trader, clock):
+    trader._get_price_data()
+    first_reply = []
+    get_candles = trader.account.get_candles
+
+    def newest_only(asset, size, count, end_time):
+        # Simulate a reply that skipped the cached newest candle
+        if not first_reply:
+            first_reply.append(count)
+            return get_candles(asset, size, 1, end_time)
+        return get_candles(asset, size, count, end_time)
+
+    trader.account.get_candles = newest_only
+    clock[0] += 120
+    trader._get_price_data()
+
+    assert trader._count == trader.history_size
+    assert_matches_full_fetch(trader, clock[0])
+    assert_emas_match(trader, int(trader._id[0]), clock[0])
@@ -0,0 +1,31 @@
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), main.KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('target', ['/', '/?ping=1'])
+def test_root_answers_with_status(server_url, target):
+    with urllib.request.urlopen(server_url + target) as response:
+        assert response.status == 200
+        assert response.read() == b"Server is running!"
+
+
+def test_other_paths_are_not_found(server_url):
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(server_url + '/health')
+    assert excinfo.value.code == 404
@@ -0,0 +1,21 @@
+def test_loss_is_recorded_when_balance_refresh_fails(trader):
+    def broken_get_balance():
+        raise ConnectionError("websocket closed")
+
+    trader.account.get_balance = broken_get_balance
+    trader._handle_order_result(-1.0)
+
+    assert trader.mm == 1
+    assert trader.gameLose == 1
+    assert trader.amount == trader.config.start_bet + 1
+    assert trader.TempLose == -1.0
+    assert trader.MaxLose == -1.0
+    assert trader._get_balance() == 1000.0
+
+
+def test_balance_is_refreshed_after_a_trade(trader):
+    trader.account.balance = 1001.0
+    trader._handle_order_result(1.0)
+
+    assert trader.gameWin == 1
+    assert trader._get_balance() == 1001.0
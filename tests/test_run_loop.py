@@ -0,0 +1,29 @@
+import pytest
+
+
+def run_ticks(trader, monkeypatch, ticks):
+    """Run the trading loop for a number of ticks and return the requested sleeps"""
+    sleeps = []
+    calls = []
+
+    def create_order():
+        calls.append(None)
+        if len(calls) > ticks:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(trader, 'create_order', create_order)
+    monkeypatch.setattr('time.sleep', sleeps.append)
+    trader.run()
+    return sleeps
+
+
+def test_default_signal_polls_every_second(trader, monkeypatch):
+    trader.config.use_full_signal = False
+
+    assert run_ticks(trader, monkeypatch, 3) == [1, 1, 1]
+
+
+def test_full_signal_sleeps_until_after_next_candle_opens(trader, clock, monkeypatch):
+    clock[0] += 20
+
+    assert run_ticks(trader, monkeypatch, 1) == [pytest.approx(41)]